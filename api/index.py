@@ -14,161 +14,571 @@
 # This is the UPDATED file. It now gracefully handles missing optional fields like 'return_date'.
 
 import os
-import re
+import regex
+import atexit
 import json
 import logging
 import hashlib
 import hmac
 import time
-from datetime import datetime
+import queue
+import tempfile
+from datetime import datetime, timezone
 from flask import Flask, request, make_response
-from threading import Thread
+from threading import Thread, Lock, BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import AuthorizedSession, Request as GoogleAuthRequest
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+
+# orjson parses the Slack bodies several times faster than the stdlib, but the bot
+# still runs on plain json where the wheel isn't available. Both loads() accept bytes,
+# and json_dumps() returns compact UTF-8 bytes either way.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 # --- Configuration ---
 
-logging.basicConfig(level=logging.INFO)
+# Production runs at WARNING so the per-message INFO/DEBUG lines cost nothing;
+# set LOG_LEVEL=DEBUG to see raw message text while troubleshooting. An unknown level
+# name falls back to WARNING instead of failing the import.
+LOG_LEVEL = getattr(logging, os.environ.get("LOG_LEVEL", "WARNING").upper(), None)
+if not isinstance(LOG_LEVEL, int):
+    LOG_LEVEL = logging.WARNING
+logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 # Initialize Flask app - Vercel will look for this 'app' object.
 app = Flask(__name__)
 
+# Slack event payloads are a few KB; anything far larger is refused before it is read
+# or hashed, so oversized bodies can't be used to burn CPU on signature checks.
+# Flask enforces the same limit on bodies sent without a Content-Length.
+MAX_BODY_BYTES = 1024 * 1024
+app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES
+
+# Environment is read once per cold start, not on every request or append.
 SLACK_SIGNING_SECRET = os.environ.get("SLACK_SIGNING_SECRET")
+SPREADSHEET_ID = os.environ.get("SPREADSHEET_ID")
+GOOGLE_CREDENTIALS_JSON = os.environ.get("GOOGLE_CREDENTIALS_JSON")
+SLACK_SIGNING_SECRET_BYTES = SLACK_SIGNING_SECRET.encode('utf-8') if SLACK_SIGNING_SECRET else None
 
 # --- Security Verification ---
 
+def _hmac_pad_states(key):
+    """Returns SHA-256 states with the HMAC inner and outer key pads already absorbed."""
+    block_size = hashlib.sha256().block_size
+    if len(key) > block_size:
+        key = hashlib.sha256(key).digest()
+    key = key.ljust(block_size, b'\0')
+    inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+    outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+    return inner, outer
+
+# The signing secret never changes, so the key schedule is computed once and each
+# verification only copies these states instead of re-padding and re-hashing the key.
+if SLACK_SIGNING_SECRET_BYTES:
+    _HMAC_INNER, _HMAC_OUTER = _hmac_pad_states(SLACK_SIGNING_SECRET_BYTES)
+
 def verify_slack_request(request_body, timestamp, signature):
     """Verifies the request signature from Slack."""
-    if not SLACK_SIGNING_SECRET or not timestamp or not signature:
-        logging.error("Verification failed: Missing secret, timestamp, or signature.")
+    if not SLACK_SIGNING_SECRET_BYTES or not timestamp or not signature:
+        logger.error("Verification failed: Missing secret, timestamp, or signature.")
         return False
 
-    try:
-        req_timestamp = int(timestamp)
-        if abs(time.time() - req_timestamp) > 60 * 5:
-            logging.error(f"Verification failed: Timestamp is too old. Server time: {time.time()}, Slack time: {req_timestamp}")
-            return False
-    except (ValueError, TypeError):
-        logging.error("Verification failed: Invalid timestamp format.")
+    # A Slack signature is always "v0=" plus 64 hex digits; reject anything else before hashing
+    # (compare_digest raises TypeError on non-ASCII str).
+    if len(signature) != 67 or not signature.isascii() or not signature.startswith('v0='):
+        logger.error("Verification failed: Malformed signature.")
+        return False
+
+    # Slack timestamps are always 10 ASCII digits (epoch seconds), so anything else is
+    # rejected up front and int() can't fail.
+    if len(timestamp) != 10 or not timestamp.isascii() or not timestamp.isdigit():
+        logger.error("Verification failed: Invalid timestamp format.")
+        return False
+
+    req_timestamp = int(timestamp)
+    now = time.time()
+    if abs(now - req_timestamp) > 60 * 5:
+        logger.error(f"Verification failed: Timestamp is too old. Server time: {now}, Slack time: {req_timestamp}")
         return False
     
-    basestring = f"v0:{timestamp}:{request_body}".encode('utf-8')
-    my_signature = 'v0=' + hmac.new(
-        SLACK_SIGNING_SECRET.encode('utf-8'),
-        basestring,
-        hashlib.sha256
-    ).hexdigest()
+    # The signed basestring is "v0:<timestamp>:<body>". Feeding its parts to the hash
+    # one after another avoids building a second copy of the body just to sign it.
+    inner = _HMAC_INNER.copy()
+    inner.update(b"v0:")
+    inner.update(timestamp.encode('ascii'))
+    inner.update(b":")
+    inner.update(request_body)
+    outer = _HMAC_OUTER.copy()
+    outer.update(inner.digest())
+    my_signature = 'v0=' + outer.hexdigest()
     
     is_valid = hmac.compare_digest(my_signature, signature)
     if not is_valid:
-        logging.error("Verification failed: Signatures do not match.")
+        logger.error("Verification failed: Signatures do not match.")
     
     return is_valid
 
 # --- Data Parsing and Sheets Logic ---
 
+# Required and optional fields are kept separate so missing return dates are tolerated.
+REQUIRED_FIELDS = ('charter_id', 'name', 'phone', 'pick_up_date')
+OPTIONAL_FIELDS = ('return_date',)
+
+# Every field is a branch of one alternation with a named group, compiled once at import,
+# so a single left-to-right pass over the message finds all of them. The third-party
+# regex engine is used so matching can release the GIL (concurrent=True) while other
+# request threads run. The skips between a label and its value are bounded and
+# possessive, so no branch can backtrack or run across the rest of the message on crafted
+# input. Ids, phones and dates are possessive runs of characters no label contains, so
+# they are kept whole and the total scan stays linear. The free-text name is the one value
+# that could contain further labels; it is capped, and a longer name is rejected rather
+# than cut short.
+NAME_MAX_LENGTH = 200
+
+# One (field, label, value) entry per field. The value sub-pattern becomes a group named
+# after the field, which is what match.lastgroup reports.
+FIELD_PATTERNS = (
+    ('charter_id', r"\*?Charter\s*Id\*?[^\d]{0,20}+", r"\d++"),
+    ('name', r"\*?Name\*?\s*+:\s*", rf"[^\r\n]{{1,{NAME_MAX_LENGTH}}}+(?![^\r\n])"),
+    ('phone', r"\*?Phone\*?[^\d]{0,20}+", r"[0-9\s+()\-]++"),
+    ('pick_up_date', r"\*?Pick\s*up\s*date\*?[^\d]{0,20}+", r"[\d-]++"),
+    ('return_date', r"\*?Return\s*date\*?[^\d]{0,20}+", r"[\d-]++"),
+)
+_FIELD_BRANCHES = {key: f"{label}(?P<{key}>{value})" for key, label, value in FIELD_PATTERNS}
+
+FIELDS_RE = regex.compile("|".join(_FIELD_BRANCHES.values()), regex.IGNORECASE)
+
+# Run on its own before the full pass: a message without a charter id is rejected anyway.
+CHARTER_ID_RE = regex.compile(_FIELD_BRANCHES['charter_id'], regex.IGNORECASE)
+
+# Optional fields the template path misses are searched for on their own, so a message
+# that is otherwise well-formed doesn't lose one that isn't written as "Label: value".
+OPTIONAL_FIELD_RES = {key: regex.compile(_FIELD_BRANCHES[key], regex.IGNORECASE) for key in OPTIONAL_FIELDS}
+
+# The trigger phrase plus the shortest possible required labels and values is longer
+# than this, so anything shorter can't be a charter request.
+MIN_MESSAGE_LENGTH = 40
+
+# The fixed charter request template: each field sits at the start of its own line as
+# "Label: value", optionally with Slack bold markers around the label. Each field lists
+# the characters its value may contain (None keeps the whole line).
+TEMPLATE_FIELDS = (
+    ('charter_id', 'Charter Id', '0123456789'),
+    ('name', 'Name', None),
+    ('phone', 'Phone', '0123456789 \t+()-'),
+    ('pick_up_date', 'Pick up date', '0123456789-'),
+    ('return_date', 'Return date', '0123456789-'),
+)
+
+def _label_key(label):
+    """Normalizes a label the way FIELDS_RE matches it: any case, any internal whitespace."""
+    return ''.join(label.split()).strip('*').casefold()
+
+_TEMPLATE_LABELS = {_label_key(label): (key, allowed) for key, label, allowed in TEMPLATE_FIELDS}
+
+# Longer than any label with generous spacing and bold markers; longer text before a
+# colon is never a label, so it isn't normalized at all.
+_TEMPLATE_LABEL_MAX = 40
+
+def _parse_template(text):
+    """
+    Extracts fields from a well-formed charter request with plain string operations.
+    Fields not laid out as the template expects are left out for FIELDS_RE to handle.
+    """
+    data = {}
+    for line in text.splitlines():
+        label, sep, value = line.partition(':')
+        if not sep or len(label) > _TEMPLATE_LABEL_MAX:
+            continue
+        field = _TEMPLATE_LABELS.get(_label_key(label))
+        if field is None:
+            continue
+        key, allowed = field
+
+        value = value.strip()
+        if not value:
+            # The value is on a later line; only FIELDS_RE can pick that up.
+            continue
+        if allowed is None and len(value) > NAME_MAX_LENGTH:
+            # Rejected here too, so both paths treat an over-long name the same way.
+            continue
+        if allowed is not None:
+            # Same value the regex branch captures: skip to the first digit, then
+            # keep the leading run of allowed characters. Values starting with a non-ASCII
+            # digit (e.g. full-width) are left for FIELDS_RE, whose \d accepts them.
+            value = value.lstrip(' \t*+()-')
+            if not value[:1].isascii() or not value[:1].isdigit():
+                continue
+            value = value[:len(value) - len(value.lstrip(allowed))].strip()
+
+        # Only the first occurrence of a field counts, as with the regex.
+        data.setdefault(key, value)
+    return data
+
+def _strip_mailto(value):
+    """Replaces a Slack '<mailto:address|display>' link in the value with its display text."""
+    # Plain string searches do this without running a regex over every name.
+    start = value.find('<mailto:')
+    if start < 0:
+        return value
+    # The display text ends at the link's closing '>', so look for the '|' before it only;
+    # a '|' later in the value isn't part of the link.
+    end = value.find('>', start)
+    bar = value.rfind('|', start, end) if end >= 0 else -1
+    if bar < 0:
+        return value
+    return value[:start] + value[bar + 1:end] + value[end + 1:]
+
+# Case-insensitive trigger checks that avoid lowercasing a full copy of the message.
+# The bytes form runs on the raw request body, so events that can never be charter
+# requests are acknowledged without parsing their JSON at all.
+CHARTER_REQUEST_RE = regex.compile(r'charter request', regex.IGNORECASE)
+CHARTER_REQUEST_BYTES_RE = regex.compile(rb'charter request', regex.IGNORECASE)
+
+# Rows parsed within the same second share one formatted timestamp. The cache is a
+# single tuple so threads always see a matching second and string.
+_TS_CACHE = (0, "")
+
+def _now_str():
+    """Returns the current UTC time as 'YYYY-MM-DD HH:MM:SS', formatting it at most once per second."""
+    global _TS_CACHE
+    now = int(time.time())
+    cached = _TS_CACHE
+    if cached[0] != now:
+        cached = _TS_CACHE = (now, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now)))
+    return cached[1]
+
 def parse_and_append(message_text):
     """
     Parses a message and appends it to the Google Sheet.
-    This function will be run in a separate thread.
+    This function is run on the background worker pool.
     """
-    logging.info("--- RAW SLACK MESSAGE TEXT ---")
-    logging.info(repr(message_text)) 
-    logging.info("--- END RAW TEXT ---")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw Slack message text: %r", message_text)
 
-    if "charter request" not in message_text.lower():
-        logging.warning("Message did not contain 'charter request'. Ignoring.")
+    if len(message_text) < MIN_MESSAGE_LENGTH:
+        logger.warning("Message is too short to be a charter request. Ignoring.")
         return
 
-    logging.info("Parsing a new charter request message.")
-    
-    # THE FIX: Separated patterns into required and optional fields.
-    required_patterns = {
-        'charter_id': r"\*?Charter\s*Id\*?[^\d]*(\d+)",
-        'name': r"\*?Name\*?\s*:\s*([^\n]+)",
-        'phone': r"\*?Phone\*?[^\d]*([0-9\s+()-]+)",
-        'pick_up_date': r"\*?Pick\s*up\s*date\*?[^\d]*([\d-]+)",
-    }
-    
-    optional_patterns = {
-        'return_date': r"\*?Return\s*date\*?[^\d]*([\d-]+)"
-    }
-    
-    data = {}
+    if not CHARTER_REQUEST_RE.search(message_text):
+        logger.warning("Message did not contain 'charter request'. Ignoring.")
+        return
+
+    logger.info("Parsing a new charter request message.")
     
-    # Process required patterns first
-    for key, pattern in required_patterns.items():
-        match = re.search(pattern, message_text, re.IGNORECASE)
-        if match:
-            value = match.group(1).strip()
-            if key == 'name':
-                value = re.sub(r'<mailto:.*\|(.*?)>', r'\1', value)
-            data[key] = value
-        else:
+    data = _parse_template(message_text)
+    if not all(key in data for key in REQUIRED_FIELDS):
+        # Messages that don't follow the template exactly go through the regex instead,
+        # unless they have no charter id and would be rejected after the full pass anyway.
+        if 'charter_id' not in data and not CHARTER_ID_RE.search(message_text, concurrent=True):
+            logger.error("Parsing failed: Could not find required pattern for: charter_id")
+            return
+        data = {}
+        # overlapped=True also tries positions inside an earlier match, so a label that sits
+        # in another field's value (e.g. a one-line message) is still found. Only the first
+        # occurrence of a field counts, so each field gets what its own search() would.
+        for match in FIELDS_RE.finditer(message_text, overlapped=True, concurrent=True):
+            data.setdefault(match.lastgroup, match.group(match.lastgroup).strip())
+    else:
+        for key in OPTIONAL_FIELDS:
+            if key not in data:
+                match = OPTIONAL_FIELD_RES[key].search(message_text, concurrent=True)
+                if match:
+                    data[key] = match.group(key).strip()
+
+    # Check required fields
+    for key in REQUIRED_FIELDS:
+        if key not in data:
             # If a required field is missing, stop processing this message.
-            logging.error(f"Parsing failed: Could not find required pattern for: {key}")
+            logger.error(f"Parsing failed: Could not find required pattern for: {key}")
             return
 
-    # Process optional patterns
-    for key, pattern in optional_patterns.items():
-        match = re.search(pattern, message_text, re.IGNORECASE)
-        if match:
-            data[key] = match.group(1).strip()
-        else:
+    data['name'] = _strip_mailto(data['name'])
+
+    # Fill in optional fields
+    for key in OPTIONAL_FIELDS:
+        if key not in data:
             # If an optional field is missing, log a warning and set it to an empty string.
-            logging.warning(f"Optional field '{key}' not found. Leaving it empty.")
+            logger.warning(f"Optional field '{key}' not found. Leaving it empty.")
             data[key] = ""
 
-    if data.get('name'):
-        name_parts = data['name'].split()
-        data['first_name'] = name_parts[0]
-        data['last_name'] = name_parts[-1] if len(name_parts) > 1 else ""
-    else:
-        data['first_name'] = ""
-        data['last_name'] = ""
+    # Only the first and last words are kept, so split off at most one word from each
+    # end instead of building a list of every word in the name.
+    name = data.get('name', '')
+    head = name.split(None, 1)
+    data['first_name'] = head[0] if head else ""
+    data['last_name'] = name.rsplit(None, 1)[-1] if len(head) > 1 else ""
     
-    data['request_received_date'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    data['request_received_date'] = _now_str()
         
-    logging.info(f"Successfully parsed data: {data}")
+    logger.info("Successfully parsed data: %s", data)
     append_to_sheet(data)
 
+# Rows are posted straight to the Sheets REST API over one keep-alive session that is
+# created once per process, so warm invocations skip both the credential parse and
+# the TCP+TLS handshake to sheets.googleapis.com.
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+RANGE_NAME = "Sheet1"
+
+# Appends go out one batch at a time to a single host, so a small pool is enough to keep
+# the TLS connection alive between batches. The timeout stops a stalled connection from
+# holding the flusher (and every row queued behind it) indefinitely.
+SHEETS_POOL_SIZE = 4
+SHEETS_TIMEOUT_SECONDS = 10
+
+# The append endpoint never changes for a deployment, so the URL is built once.
+SHEETS_APPEND_URL = f"{SHEETS_API_URL}/{SPREADSHEET_ID}/values/{RANGE_NAME}:append?valueInputOption=USER_ENTERED"
+
+_SHEETS_CREDS = None
+_SHEETS_SESSION = None
+_SESSION_LOCK = Lock()
+
+# Vercel keeps /tmp for the life of a sandbox, which can outlive a single process. Caching
+# the access token there lets a fresh process skip the OAuth token exchange while the
+# token is still valid. The version tag keeps an incompatible older file from being read.
+TOKEN_CACHE_PATH = "/tmp/sheets-token.v1.json"
+
+_CACHED_TOKEN = None
+
+def _load_cached_token(creds):
+    """Seeds the credentials with an access token cached by an earlier process, if there is one."""
+    global _CACHED_TOKEN
+    try:
+        with open(TOKEN_CACHE_PATH, 'rb') as f:
+            cached = json_loads(f.read())
+        if cached['client_email'] != creds.service_account_email:
+            return
+        # google-auth compares expiry as a naive UTC datetime. Both values are read before
+        # either is set, so a bad entry can't leave a token without an expiry behind.
+        token = cached['token']
+        expiry = datetime.fromtimestamp(cached['expiry'], timezone.utc).replace(tzinfo=None)
+        creds.token, creds.expiry = token, expiry
+        _CACHED_TOKEN = creds.token
+    except (OSError, ValueError, KeyError, TypeError, OverflowError):
+        pass
+
+def _save_token(creds):
+    """Writes the current access token to the /tmp cache when it has changed."""
+    global _CACHED_TOKEN
+    if not creds.token or creds.token == _CACHED_TOKEN or creds.expiry is None:
+        return
+    try:
+        payload = json_dumps({
+            'client_email': creds.service_account_email,
+            'token': creds.token,
+            'expiry': creds.expiry.replace(tzinfo=timezone.utc).timestamp(),
+        })
+        # mkstemp creates a fresh 0600 file with O_EXCL, so nothing pre-created at a
+        # guessable path (file or symlink) is ever written through.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(TOKEN_CACHE_PATH), prefix="sheets-token.")
+    except OSError as e:
+        logger.warning(f"Could not cache the Sheets access token: {e}")
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, TOKEN_CACHE_PATH)
+        _CACHED_TOKEN = creds.token
+    except OSError as e:
+        logger.warning(f"Could not cache the Sheets access token: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def _get_session():
+    """Returns the cached authorized HTTP session for the Sheets API, creating it on first use."""
+    global _SHEETS_CREDS, _SHEETS_SESSION
+    # Double-checked so the warm path never takes the lock, while two threads racing
+    # on a cold start can't both parse the key and open separate sessions.
+    if _SHEETS_SESSION is None:
+        with _SESSION_LOCK:
+            if _SHEETS_SESSION is None:
+                if not GOOGLE_CREDENTIALS_JSON:
+                    raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable not set.")
+
+                creds_dict = json_loads(GOOGLE_CREDENTIALS_JSON)
+                _SHEETS_CREDS = service_account.Credentials.from_service_account_info(creds_dict, scopes=SHEETS_SCOPES)
+                _load_cached_token(_SHEETS_CREDS)
+
+                session = AuthorizedSession(_SHEETS_CREDS)
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SHEETS_POOL_SIZE, pool_block=False))
+                _SHEETS_SESSION = session
+    return _SHEETS_SESSION
+
+# Rows are queued for one long-lived flusher thread, which coalesces whatever arrives
+# within a short window into a single append call, so a burst of messages costs one
+# HTTPS round-trip (and one unit of quota) instead of one per row. Batches are capped
+# so a large burst doesn't turn into a single slow request.
+BATCH_WINDOW_SECONDS = 0.2
+BATCH_MAX_ROWS = 25
+
+# At exit the flusher may still be collecting its last window and then sending it, so the
+# join waits out both, plus a second of slack, rather than cutting that POST off.
+FLUSH_TIMEOUT_SECONDS = BATCH_WINDOW_SECONDS + SHEETS_TIMEOUT_SECONDS + 1
+
+# Queued after the last row at shutdown to tell the flusher to send what it has and stop.
+_STOP_FLUSHER = None
+
+_ROW_QUEUE = queue.Queue()
+_SEND_LOCK = Lock()
+
 def append_to_sheet(data):
-    """Appends the extracted data as a new row to the configured Google Sheet."""
+    """Queues the extracted data as a new row for the configured Google Sheet."""
+    row_values = [
+        data.get('request_received_date', ''),
+        data.get('charter_id', ''),
+        data.get('first_name', ''),
+        data.get('last_name', ''),
+        data.get('phone', ''),
+        data.get('pick_up_date', ''),
+        data.get('return_date', '') # This will now safely get the empty string if date was not found
+    ]
+    _ROW_QUEUE.put(row_values)
+
+def _collect_batch():
+    """
+    Waits for the next queued row, then keeps collecting until the batch is full or the
+    window closes. Returns the rows and whether the stop marker was reached.
+    """
+    row = _ROW_QUEUE.get()
+    if row is _STOP_FLUSHER:
+        return [], True
+
+    rows = [row]
+    deadline = time.monotonic() + BATCH_WINDOW_SECONDS
+    while len(rows) < BATCH_MAX_ROWS:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            row = _ROW_QUEUE.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if row is _STOP_FLUSHER:
+            return rows, True
+        rows.append(row)
+    return rows, False
+
+def _row_flusher():
+    """Sends queued rows to the Google Sheet in batches for the lifetime of the process."""
+    while True:
+        rows, stopped = _collect_batch()
+        if rows:
+            # A single flusher keeps rows in the order they were queued; the lock only
+            # makes it wait for a cold-start warm-up still minting the token.
+            with _SEND_LOCK:
+                _append_rows(rows)
+        if stopped:
+            return
+
+def _append_rows(rows):
+    """Appends the given rows to the configured Google Sheet in one API call."""
     try:
-        SPREADSHEET_ID = os.environ.get("SPREADSHEET_ID")
-        RANGE_NAME = "Sheet1"
-        
-        creds_json = os.environ.get("GOOGLE_CREDENTIALS_JSON")
-        if not creds_json:
-            raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable not set.")
-            
-        creds_dict = json.loads(creds_json)
-        creds = service_account.Credentials.from_service_account_info(creds_dict)
-        
-        service = build('sheets', 'v4', credentials=creds)
-
-        row_values = [
-            data.get('request_received_date', ''),
-            data.get('charter_id', ''),
-            data.get('first_name', ''),
-            data.get('last_name', ''),
-            data.get('phone', ''),
-            data.get('pick_up_date', ''),
-            data.get('return_date', '') # This will now safely get the empty string if date was not found
-        ]
-
-        body = { 'values': [row_values] }
+        session = _get_session()
+
+        body = { 'values': rows }
         
-        result = service.spreadsheets().values().append(
-            spreadsheetId=SPREADSHEET_ID,
-            range=RANGE_NAME,
-            valueInputOption='USER_ENTERED',
-            body=body
-        ).execute()
+        response = session.post(
+            SHEETS_APPEND_URL,
+            data=json_dumps(body),
+            headers={'Content-Type': 'application/json'},
+            timeout=SHEETS_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        result = json_loads(response.content)
+        # The session refreshes the token itself when it expires; keep the cache current.
+        _save_token(_SHEETS_CREDS)
         
-        logging.info(f"{result.get('updates').get('updatedCells')} cells appended.")
+        logger.info("%s cells appended.", result.get('updates').get('updatedCells'))
     except Exception as e:
-        logging.error(f"Error appending to Google Sheet: {e}")
+        logger.error(f"Error appending {len(rows)} row(s) to Google Sheet: {e}")
+
+_FLUSHER = Thread(target=_row_flusher, daemon=True)
+_FLUSHER.start()
+
+def _stop_flusher():
+    """Lets the flusher send every row still queued before the process exits."""
+    _ROW_QUEUE.put(_STOP_FLUSHER)
+    _FLUSHER.join(timeout=FLUSH_TIMEOUT_SECONDS)
+
+# Vercel may recycle the process mid-window; send whatever is left on exit.
+atexit.register(_stop_flusher)
+
+def _warm_sheets():
+    """Creates the Sheets session and mints an access token ahead of the first append."""
+    # Holding the send lock makes an early flush wait for the token instead of minting its own.
+    with _SEND_LOCK:
+        try:
+            _get_session()
+            if not _SHEETS_CREDS.valid:
+                _SHEETS_CREDS.refresh(GoogleAuthRequest())
+                _save_token(_SHEETS_CREDS)
+            logger.info("Sheets client warmed up.")
+        except Exception as e:
+            logger.warning(f"Could not warm up the Sheets client: {e}")
+
+# On cold start, overlap the credential parse and the OAuth token exchange with handling
+# the first Slack request instead of paying for both inside the first flush.
+if GOOGLE_CREDENTIALS_JSON:
+    Thread(target=_warm_sheets, daemon=True).start()
+
+# Slack events are handed to a small pool of reused worker threads instead of starting
+# a thread per event. The semaphore caps how many events can be queued or running at
+# once, so a burst that outruns the workers is shed instead of growing memory. A
+# WORKER_THREADS value that isn't a positive integer falls back to 8 instead of failing
+# the import.
+DEFAULT_WORKER_THREADS = 8
+_worker_threads = os.environ.get("WORKER_THREADS", "").strip()
+if _worker_threads.isascii() and _worker_threads.isdigit() and int(_worker_threads) > 0:
+    WORKER_THREADS = int(_worker_threads)
+else:
+    if _worker_threads:
+        logger.warning(f"Invalid WORKER_THREADS {_worker_threads!r}; using {DEFAULT_WORKER_THREADS}.")
+    WORKER_THREADS = DEFAULT_WORKER_THREADS
+MAX_PENDING_EVENTS = 1000
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="sheet-worker")
+_EVENT_SLOTS = BoundedSemaphore(MAX_PENDING_EVENTS)
+
+def _submit_event(fn, *args):
+    """Runs fn(*args) on the worker pool, or drops it if too many events are pending."""
+    if not _EVENT_SLOTS.acquire(blocking=False):
+        logger.error("Too many pending Slack events. Dropping Slack message.")
+        return
+    try:
+        future = _EXECUTOR.submit(fn, *args)
+    except RuntimeError as e:
+        # The pool refuses new work once the interpreter is shutting down.
+        _EVENT_SLOTS.release()
+        logger.error(f"Could not queue Slack message: {e}")
+        return
+    future.add_done_callback(_event_done)
+
+def _event_done(future):
+    """Frees the event's slot and logs any error the worker raised."""
+    _EVENT_SLOTS.release()
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Error handling Slack message: {error}")
+
+def _dispatch(raw_body):
+    """Parses a verified Slack event body on a worker and hands message text to the parser."""
+    body = json_loads(raw_body)
+    if body.get("type") == "event_callback":
+        event = body.get("event", {})
+        if event.get("type") == "message" and not event.get("bot_id"):
+            parse_and_append(event.get("text", ""))
 
 # --- Vercel Entry Point ---
 
@@ -182,22 +592,31 @@ def slack_events():
     if request.method == "POST":
         signature = request.headers.get('X-Slack-Signature')
         timestamp = request.headers.get('X-Slack-Request-Timestamp')
-        request_body = request.get_data().decode('utf-8')
+        if request.content_length and request.content_length > MAX_BODY_BYTES:
+            logger.error("Slack request rejected: body too large.")
+            return make_response("", 413)
+
+        # Read the body once as bytes and don't let Flask keep a second copy of it.
+        raw_body = request.get_data(cache=False)
 
-        if not verify_slack_request(request_body, timestamp, signature):
-            logging.error("Slack request verification FAILED!")
+        if not verify_slack_request(raw_body, timestamp, signature):
+            logger.error("Slack request verification FAILED!")
             return make_response("Invalid request", 403)
 
-        body = json.loads(request_body)
-        if body.get("type") == "url_verification":
-            return make_response(body.get("challenge"), 200, {"Content-Type": "text/plain"})
+        # Slack's one-off URL check is the only body answered without the trigger phrase.
+        if b'"url_verification"' in raw_body:
+            body = json_loads(raw_body)
+            if body.get("type") == "url_verification":
+                return make_response(body.get("challenge"), 200, {"Content-Type": "text/plain"})
 
-        if body.get("type") == "event_callback":
-            event = body.get("event", {})
-            if event.get("type") == "message" and not event.get("bot_id"):
-                thread = Thread(target=parse_and_append, args=[event.get("text", "")])
-                thread.start()
-        
+        # Most events are discarded: bot posts and anything that can't be a charter request
+        # are acknowledged from a couple of byte scans, without parsing the JSON at all.
+        if b'"bot_id"' in raw_body or not CHARTER_REQUEST_BYTES_RE.search(raw_body):
+            return make_response("", 200)
+
+        # Everything past verification happens on a worker, so Slack gets its ack after
+        # one HMAC and a few byte scans regardless of how large the event is.
+        _submit_event(_dispatch, raw_body)
         return make_response("", 200)
     
     return make_response("Not Found", 404)